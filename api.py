@@ -3,87 +3,327 @@ Fraud Detection API
 FastAPI server for credit card fraud detection using machine learning
 """
 
-import joblib
-from fastapi import FastAPI, HTTPException, status
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import orjson
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
+from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
 import uvicorn
-from datetime import datetime
-from basemodel import InputData, ProcessedInputData,HealthResponse,PredictionResponse
+from basemodel import InputData, HealthResponse,PredictionResponse
+from cache import PredictionCache, RedisPredictionCache
+from inference import (
+    init_worker, load_model, model_fingerprint, predict_proba_worker, warmup_worker
+)
+from features import TEMPORAL_FEATURES, decompose_epoch, epoch_hours
 import numpy as np
-import pandas as pd
 from typing import Dict
 
-# ============================================================================
-# FastAPI App Setup
-# ============================================================================
-app = FastAPI(
-    title="Fraud Detection API",
-    description="REST API for detecting fraudulent credit card transactions",
-    version="1.0.0"
-)
+# Micro-batching settings: the batcher groups up to MAX_BATCH queued requests,
+# waiting at most MAX_WAIT_MS for the batch to fill, into one model call
+MAX_BATCH = 32
+MAX_WAIT_MS = 5
+
+# Minimum fraud probability for a transaction to be classified as fraud
+DECISION_THRESHOLD = 0.5
+
+# Number of distinct feature tuples whose predictions are kept in memory
+CACHE_SIZE = 100_000
+
+# Worker processes scoring batches outside this process's GIL. 0 scores in
+# the default thread executor, which suits the Gunicorn setup where each
+# worker already owns a core and IPC would cost more than scoring a batch
+INFERENCE_PROCESSES = int(os.environ.get("INFERENCE_PROCESSES", "0"))
+
+# Redis server shared by all workers as a second-level prediction cache;
+# disabled when REDIS_URL is not set
+REDIS_URL = os.environ.get("REDIS_URL")
+REDIS_TTL = int(os.environ.get("REDIS_TTL", "3600"))
+
+# A batch waits at most REDIS_READ_TIMEOUT_MS for its Redis lookup and any
+# other command at most REDIS_SOCKET_TIMEOUT seconds; after a timeout or
+# error Redis is bypassed for REDIS_COOLDOWN seconds
+REDIS_READ_TIMEOUT_MS = float(os.environ.get("REDIS_READ_TIMEOUT_MS", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "0.1"))
+REDIS_COOLDOWN = float(os.environ.get("REDIS_COOLDOWN", "30"))
 
-# Load the trained model
+MODEL_PATH = "./artifacts/fraud_model.pkl"
+ONNX_MODEL_PATH = "./artifacts/fraud_model.onnx"
+
+# Load the trained model with the fastest backend that supports it
 try:
-    model = joblib.load("./artifacts/fraud_model.pkl")
+    model = load_model(MODEL_PATH, ONNX_MODEL_PATH)
 except Exception as e:
     print(f"Error loading model: {e}")
     model = None
 
+# Feature order expected by the model, fetched once instead of per request
+FEATURE_ORDER = tuple(model.feature_names_in_.tolist()) if model is not None else ()
+FEATURE_IDX = {name: i for i, name in enumerate(FEATURE_ORDER)}
+
+# Request fields passed to the model unchanged, in the order predict() queues them
+INPUT_FIELDS = (
+    "merchant", "category", "city", "state", "job",
+    "amt", "lat", "long", "city_pop"
+)
+
+# The health payload never changes within a process, so it is encoded once
+HEALTH_BYTES = orjson.dumps(
+    HealthResponse(status="healthy", model_loaded=model is not None).model_dump()
+)
+
+# Predictions keyed by the INPUT_FIELDS values plus the epoch hour
+prediction_cache = PredictionCache(CACHE_SIZE)
+
+# Pending (features, future) pairs, created on startup by lifespan()
+prediction_queue: asyncio.Queue = None
+
+# Process pool used when INFERENCE_PROCESSES > 0, created by lifespan()
+inference_executor: ProcessPoolExecutor = None
+
+# Shared cache used when REDIS_URL is set, created by lifespan()
+redis_cache: RedisPredictionCache = None
+
+# Scoring tasks and fire-and-forget Redis writes, referenced until they finish
+_background_tasks = set()
+
 
 # ============================================================================
-# Helper Functions
+# Batching
 # ============================================================================
-def transform_input(input_data: InputData) -> ProcessedInputData:
+def build_batch(feature_tuples: list) -> np.ndarray:
     """
-    Transform InputData with datetime into ProcessedInputData with separated components.
-    
-    This function:
-    1. Parses the datetime from ISO format
-    2. Extracts hour, day, month, and weekday components
-    3. Returns ProcessedInputData ready for model prediction
-    
+    Assemble queued feature tuples into one model input array.
+
     Args:
-        input_data (InputData): Raw transaction input with datetime field
-        
+        feature_tuples (list): INPUT_FIELDS values followed by the epoch hour,
+            one tuple per transaction
+
     Returns:
-        ProcessedInputData: Processed data with datetime decomposed
-        
+        np.ndarray: Object array with one row per transaction in FEATURE_ORDER
+
     Raises:
-        ValueError: If datetime parsing fails
+        KeyError: If the model does not expect one of the features
     """
-    # Parse datetime
-    if isinstance(input_data.trans_date_trans_time, str):
-        try:
-            trans_datetime = datetime.fromisoformat(input_data.trans_date_trans_time)
-        except ValueError as e:
-            raise ValueError(f"Invalid datetime format: {str(e)}")
-    else:
-        trans_datetime = input_data.trans_date_trans_time
-    
-    # Extract temporal features
-    trans_hour = trans_datetime.hour
-    trans_day = trans_datetime.day
-    trans_month = trans_datetime.month
-    trans_weekday = trans_datetime.weekday()
-    
-    # Create ProcessedInputData with all features
-    processed_data = ProcessedInputData(
-        merchant=input_data.merchant,
-        category=input_data.category,
-        city=input_data.city,
-        state=input_data.state,
-        job=input_data.job,
-        amt=input_data.amt,
-        lat=input_data.lat,
-        long=input_data.long,
-        city_pop=input_data.city_pop,
-        trans_hour=trans_hour,
-        trans_day=trans_day,
-        trans_month=trans_month,
-        trans_weekday=trans_weekday
+    features = np.empty((len(feature_tuples), len(INPUT_FIELDS) + 1), dtype=object)
+    for i, values in enumerate(feature_tuples):
+        features[i] = values
+
+    temporal = np.empty((len(feature_tuples), len(TEMPORAL_FEATURES)), dtype=np.int64)
+    decompose_epoch(features[:, -1].astype(np.int64) * 3600, temporal)
+
+    batch = np.empty((len(feature_tuples), len(FEATURE_ORDER)), dtype=object)
+    batch[:, [FEATURE_IDX[name] for name in INPUT_FIELDS]] = features[:, :-1]
+    batch[:, [FEATURE_IDX[name] for name in TEMPORAL_FEATURES]] = temporal
+    return batch
+
+
+# Transaction scored at startup, in INPUT_FIELDS order followed by the epoch hour
+WARMUP_FEATURES = ("", "", "", "", "", 0.0, 0.0, 0.0, 0, 0)
+
+
+def _warmup() -> None:
+    """
+    Score one dummy transaction so lazy initialization happens before traffic.
+
+    Runs the same path as a real batch: the Numba kernel is compiled (or
+    loaded from its on-disk cache) and the model's first call pays its
+    import and page-in costs here instead of on the first request.
+    """
+    if model is None:
+        return
+    model.predict_proba(build_batch([WARMUP_FEATURES]))
+
+
+async def _warmup_pool(executor: ProcessPoolExecutor) -> None:
+    """
+    Start every worker of a process pool and score a dummy row in each.
+
+    The pool only spawns its workers, which load the model in their
+    initializer, once work is submitted. Dummy batches are submitted until
+    INFERENCE_PROCESSES distinct workers have answered, so none of them is
+    still starting when traffic arrives.
+    """
+    loop = asyncio.get_running_loop()
+    batch = build_batch([WARMUP_FEATURES])
+    workers = set()
+    while len(workers) < INFERENCE_PROCESSES:
+        workers.update(await asyncio.gather(*(
+            loop.run_in_executor(executor, warmup_worker, batch)
+            for _ in range(INFERENCE_PROCESSES - len(workers))
+        )))
+
+
+def _start_pool() -> ProcessPoolExecutor:
+    """Create the inference process pool, each worker loading the model."""
+    # Spawned rather than forked: the event loop process may hold threads
+    return ProcessPoolExecutor(
+        max_workers=INFERENCE_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(MODEL_PATH, ONNX_MODEL_PATH)
     )
-    
-    return processed_data
+
+
+async def _predict(batch: np.ndarray) -> np.ndarray:
+    """
+    Score a batch off the event loop.
+
+    Uses the process pool when INFERENCE_PROCESSES is set and the default
+    thread executor otherwise. A pool whose worker died (OOM kill, crash)
+    fails every later submit, so it is replaced, the new pool is warmed up in
+    the background and the batch is scored in-process instead.
+    """
+    global inference_executor
+    loop = asyncio.get_running_loop()
+    executor = inference_executor
+    if executor is None:
+        return await loop.run_in_executor(None, model.predict_proba, batch)
+    try:
+        return await loop.run_in_executor(executor, predict_proba_worker, batch)
+    except BrokenProcessPool as e:
+        print(f"Inference process pool broken, restarting it: {e}")
+        # Concurrent batches share the broken pool; only the first replaces it
+        if inference_executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            inference_executor = _start_pool()
+            warmup = asyncio.create_task(_warmup_pool(inference_executor))
+            _background_tasks.add(warmup)
+            warmup.add_done_callback(_background_tasks.discard)
+        return await loop.run_in_executor(None, model.predict_proba, batch)
+
+
+async def _score(items: list) -> None:
+    """
+    Resolve the futures of one batch of (features, future) items.
+
+    When Redis is configured, the batch is first looked up with one MGET and
+    only the misses are scored; their results are written back without
+    waiting. Each item's future receives its [not_fraud, fraud]
+    probabilities, or the exception raised by the lookup or the model, so
+    no request of the batch is left waiting.
+    """
+    try:
+        if redis_cache is not None:
+            cached = await redis_cache.get_many([values for values, _ in items])
+            misses = []
+            for item, probabilities in zip(items, cached):
+                if probabilities is None:
+                    misses.append(item)
+                elif not item[1].done():
+                    item[1].set_result(probabilities)
+            items = misses
+            if not items:
+                return
+
+        probabilities = await _predict(build_batch([values for values, _ in items]))
+    except Exception as e:
+        for _, future in items:
+            if not future.done():
+                future.set_exception(e)
+        return
+
+    for i, (_, future) in enumerate(items):
+        if not future.done():
+            future.set_result(probabilities[i])
+
+    if redis_cache is not None:
+        write = asyncio.create_task(
+            redis_cache.put_many([values for values, _ in items], probabilities)
+        )
+        _background_tasks.add(write)
+        write.add_done_callback(_background_tasks.discard)
+
+
+async def batcher():
+    """
+    Background task that groups queued prediction requests into batches.
+
+    Waits for the first pending request, then collects up to MAX_BATCH items
+    or until MAX_WAIT_MS elapses. Each item carries its INPUT_FIELDS values
+    and the transaction time as hours since the epoch.
+
+    Every batch is handed to its own _score() task, so the queue keeps
+    draining while batches are scored. Up to INFERENCE_PROCESSES batches are
+    in flight with the process pool, one at a time without it; while all
+    slots are busy, requests accumulate and the next batch fills up.
+    """
+    slots = asyncio.Semaphore(INFERENCE_PROCESSES if inference_executor is not None else 1)
+    loop = asyncio.get_running_loop()
+    while True:
+        await slots.acquire()
+        items = [await prediction_queue.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        while len(items) < MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(prediction_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        task = asyncio.create_task(_score(items))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the model, and the process pool when enabled, and start the
+    prediction batcher before accepting connections, then stop it on shutdown.
+    """
+    global prediction_queue, inference_executor, redis_cache
+    _warmup()
+    if INFERENCE_PROCESSES > 0 and model is not None:
+        inference_executor = _start_pool()
+        await _warmup_pool(inference_executor)
+    if REDIS_URL and model is not None:
+        # Commands are not retried: a failure just bypasses the cache
+        client = Redis.from_url(
+            REDIS_URL,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            retry=Retry(NoBackoff(), 0)
+        )
+        redis_cache = RedisPredictionCache(
+            client,
+            namespace=model_fingerprint(MODEL_PATH),
+            ttl=REDIS_TTL,
+            read_timeout=REDIS_READ_TIMEOUT_MS / 1000,
+            cooldown=REDIS_COOLDOWN
+        )
+    prediction_queue = asyncio.Queue()
+    batcher_task = asyncio.create_task(batcher())
+    yield
+    batcher_task.cancel()
+    if redis_cache is not None:
+        await redis_cache.close()
+        redis_cache = None
+    if inference_executor is not None:
+        inference_executor.shutdown(wait=False, cancel_futures=True)
+        inference_executor = None
+
+
+# ============================================================================
+# FastAPI App Setup
+# ============================================================================
+app = FastAPI(
+    title="Fraud Detection API",
+    description="REST API for detecting fraudulent credit card transactions",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 
 # ============================================================================
@@ -116,20 +356,22 @@ def root():
 
 @app.get(
     "/api/health",
-    response_model=HealthResponse,
+    response_model=None,
+    responses={200: {"model": HealthResponse}},
     tags=["Health"],
     summary="Check API Health",
     response_description="API health status"
 )
-def health() -> HealthResponse:
+async def health() -> Response:
     """
     Check if the API is running and the model is loaded.
     
     This endpoint is useful for monitoring and load balancing.
-    Returns the current API status and model availability.
+    Returns the current API status and model availability, prebuilt
+    at import as HEALTH_BYTES.
     
     Returns:
-        HealthResponse: API status and model load status
+        Response: HealthResponse JSON with API status and model load status
         
     Example:
         GET /api/health
@@ -140,20 +382,18 @@ def health() -> HealthResponse:
             "model_loaded": true
         }
     """
-    return HealthResponse(
-        status="healthy",
-        model_loaded=model is not None
-    )
+    return Response(content=HEALTH_BYTES, media_type="application/json")
 
 
 @app.post(
     "/api/predict",
-    response_model=PredictionResponse,
+    response_model=None,
+    responses={200: {"model": PredictionResponse}},
     tags=["Predictions"],
     summary="Predict Fraud",
     response_description="Fraud prediction with probabilities"
 )
-def predict(request: InputData) -> PredictionResponse:
+async def predict(request: InputData) -> ORJSONResponse:
     """
     Make a fraud prediction for a credit card transaction.
     
@@ -166,8 +406,9 @@ def predict(request: InputData) -> PredictionResponse:
     - Validates input data
     - Parses datetime and extracts temporal features
     - Reorders features in the correct order expected by the model
+    - Serves repeated transactions from an in-memory prediction cache
     - Applies preprocessing pipeline
-    - Generates predictions
+    - Generates predictions, batched with other concurrent requests
     
     Args:
         request (InputData): Transaction data including:
@@ -181,12 +422,14 @@ def predict(request: InputData) -> PredictionResponse:
             - trans_date_trans_time: ISO 8601 datetime string
         
     Returns:
-        PredictionResponse: Prediction result with probabilities and confidence
+        ORJSONResponse: Prediction result with probabilities, shaped like
+        PredictionResponse and serialized by orjson without re-validation
         
     Raises:
         HTTPException 503: Model not loaded
-        HTTPException 400: Invalid input or prediction error
+        HTTPException 400: Missing feature or invalid value
         HTTPException 422: Validation error (missing fields, wrong types)
+        Any other error raised by the model surfaces as a 500
         
     Example:
         POST /api/predict
@@ -221,33 +464,36 @@ def predict(request: InputData) -> PredictionResponse:
         )
 
     try:
-        # Transform input: InputData -> ProcessedInputData
-        processed_data = transform_input(request)
-        
-        # Convert to dictionary
-        features_dict = processed_data.dict()
-        
-        # Get feature order from model
-        feature_order = model.feature_names_in_.tolist()
-        
-        # Create DataFrame with features in correct order
-        features_df = pd.DataFrame([features_dict])
-        features_df = features_df[feature_order]
+        # Raw fields plus the transaction time truncated to the hour, which
+        # determines all temporal features; Pydantic has already parsed the
+        # datetime. The tuple doubles as the prediction cache key and follows
+        # the order of INPUT_FIELDS
+        features = (
+            request.merchant, request.category, request.city, request.state,
+            request.job, request.amt, request.lat, request.long, request.city_pop,
+            epoch_hours(request.trans_date_trans_time)
+        )
         
-        # Make prediction
-        prediction = model.predict(features_df)[0]
-        probabilities = model.predict_proba(features_df)[0]
+        probabilities = prediction_cache.get(features)
+        if probabilities is None:
+            # Queue the features and wait for the batcher to score them
+            future = asyncio.get_running_loop().create_future()
+            await prediction_queue.put((features, future))
+            probabilities = await future
+            prediction_cache.put(features, probabilities)
         
-        # Convert prediction to string ("fraud" or "not_fraud")
-        prediction_str = "fraud" if prediction == 1 else "not_fraud"
+        # The class follows from the fraud probability, so the model is only
+        # run once per batch
+        prediction_str = "fraud" if probabilities[1] >= DECISION_THRESHOLD else "not_fraud"
         
-        return PredictionResponse(
-            prediction=prediction_str,
-            proba={
-                "not_fraud": float(probabilities[0]),
-                "fraud": float(probabilities[1])
+        # orjson serializes the NumPy probabilities natively
+        return ORJSONResponse({
+            "prediction": prediction_str,
+            "proba": {
+                "not_fraud": probabilities[0],
+                "fraud": probabilities[1]
             }
-        )
+        })
         
     except KeyError as e:
         raise HTTPException(
@@ -259,11 +505,6 @@ def predict(request: InputData) -> PredictionResponse:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid value: {str(e)}"
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error processing prediction: {str(e)}"
-        )
 
 
 # ============================================================================
@@ -271,10 +512,17 @@ def predict(request: InputData) -> PredictionResponse:
 # ============================================================================
 if __name__ == "__main__":
     print("Starting Fraud Detection API...")
-    print("API Documentation: http://localhost:8000/docs")
+    print("API Documentation: http://localhost:8080/docs")
+    # uvloop and httptools replace the asyncio loop and the pure-Python h11
+    # parser; per-request access logs are disabled on the hot path.
+    # For containers use the Gunicorn launcher (gunicorn_conf.py)
     uvicorn.run(
-        app,
+        "api:app",
         host="0.0.0.0",
         port=8080,
-        log_level="info"
+        loop="uvloop",
+        http="httptools",
+        workers=os.cpu_count(),
+        log_level="warning",
+        access_log=False
     )
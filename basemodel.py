@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from pydantic import Field
-from typing import Dict 
+from typing import Annotated, Dict 
 
 class PredictionResponse(BaseModel):
     """Response model for fraud prediction endpoint"""
@@ -15,8 +15,8 @@ class PredictionResponse(BaseModel):
     )
     
     #Documentation Example ffor Swagger UI
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "prediction": "not_fraud",
                 "proba": {
@@ -26,19 +26,21 @@ class PredictionResponse(BaseModel):
 
             }
         }
+    )
 
 class HealthResponse(BaseModel):
     """Response model for health check endpoint"""
     status: str = Field(..., description="API status")
     model_loaded: bool = Field(..., description="Whether the ML model is loaded")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "status": "healthy",
                 "model_loaded": True
             }
         }
+    )
 
 
 
@@ -58,6 +60,9 @@ class InputData(BaseModel):
         city_pop (int): Population of the city
         trans_date_trans_time (datetime): Date and time of transaction
 
+    The model is frozen and rejects unknown fields, strings longer than
+    256 characters and out-of-range numeric values.
+
     Example:
         {
             "merchant": "Walmart",
@@ -72,47 +77,17 @@ class InputData(BaseModel):
             "trans_date_trans_time": "2025-12-04T14:30:00"
         }
     """
+    model_config = ConfigDict(frozen=True, extra="forbid", str_max_length=256)
+
     merchant: str
     category: str
     city: str
     state: str
     job: str
-    amt: float
-    lat: float
-    long: float
-    city_pop: int
+    amt: Annotated[float, Field(ge=0, le=1e7)]
+    lat: Annotated[float, Field(ge=-90, le=90)]
+    long: Annotated[float, Field(ge=-180, le=180)]
+    # Above the population of the largest metropolitan area
+    city_pop: Annotated[int, Field(ge=0, le=50_000_000)]
     trans_date_trans_time: datetime
 
-
-class ProcessedInputData(BaseModel):
-    """
-    ProcessedInputData represents the processed transaction record with datetime fields broken down.
-
-    Attributes:
-        merchant (str): Name of the merchant
-        category (str): Category of the transaction
-        city (str): City where transaction occurred
-        state (str): State where transaction occurred
-        job (str): Job of the customer
-        amt (int): Transaction amount
-        lat (float): Latitude of transaction location
-        long (float): Longitude of transaction location
-        city_pop (int): Population of the city
-        trans_hour (int): Hour of the transaction (0-23)
-        trans_day (int): Day of the month (1-31)
-        trans_month (int): Month of the transaction (1-12)
-        trans_weekday (int): Day of the week (0=Monday, 6=Sunday)
-    """
-    merchant: str
-    category: str
-    city: str
-    state: str
-    job: str
-    amt: float
-    lat: float
-    long: float
-    city_pop: int
-    trans_hour: int
-    trans_day: int
-    trans_month: int
-    trans_weekday: int
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Prediction cache
+In-memory and Redis caches for model predictions keyed by the feature tuple
+"""
+
+import asyncio
+import time
+from typing import Any, Hashable, List, Optional, Sequence
+import numpy as np
+import orjson
+import xxhash
+from redis.exceptions import RedisError
+
+
+class PredictionCache:
+    """
+    Bounded mapping that evicts entries in insertion order.
+
+    The model is deterministic, so a prediction computed once for a feature
+    tuple can be served again without touching the model. Entries live in a
+    plain dict and a fixed-size ring records the order keys were inserted;
+    once the ring is full each new key takes the oldest slot and that entry
+    is dropped. Lookups are a single dict access with no recency bookkeeping.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in the cache
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = {}
+        self._ring = [None] * maxsize
+        self._cursor = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        return self._data.get(key)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the oldest entry if full."""
+        if key in self._data:
+            self._data[key] = value
+            return
+        evicted = self._ring[self._cursor]
+        if evicted is not None:
+            del self._data[evicted]
+        self._ring[self._cursor] = key
+        self._cursor = (self._cursor + 1) % self.maxsize
+        self._data[key] = value
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+        self._ring = [None] * self.maxsize
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisPredictionCache:
+    """
+    Prediction cache shared by every API worker through Redis.
+
+    Entries are stored under "fraud:<namespace>:<digest>", where the digest
+    is the 128-bit xxHash of the orjson-encoded feature tuple and the
+    namespace identifies the model, so predictions from a previous model
+    are never served after a deploy. Values are the orjson-encoded
+    [not_fraud, fraud] probabilities and expire after ttl seconds.
+
+    A lookup taking longer than read_timeout is abandoned, and after a
+    timeout or Redis error the cache is bypassed for cooldown seconds, so an
+    outage or a stalled server only costs the cache, never the prediction.
+    Values that are not two probabilities are treated as misses and get
+    overwritten once the transaction is scored again; a batch whose features
+    orjson cannot encode skips the cache.
+
+    Args:
+        client: redis.asyncio.Redis client
+        namespace (str): Identifier of the model producing the predictions
+        ttl (int): Seconds before a cached prediction expires
+        read_timeout (float): Seconds a batch lookup may take
+        cooldown (float): Seconds Redis is bypassed after a failure
+    """
+
+    def __init__(self, client, namespace: str, ttl: int = 3600,
+                 read_timeout: float = 0.005, cooldown: float = 30.0):
+        self.client = client
+        self.ttl = ttl
+        self.read_timeout = read_timeout
+        self.cooldown = cooldown
+        self._prefix = f"fraud:{namespace}:"
+        self._retry_at = 0.0
+
+    def key(self, features: tuple) -> str:
+        """Return the Redis key of a feature tuple."""
+        return self._prefix + xxhash.xxh3_128_hexdigest(orjson.dumps(features))
+
+    @property
+    def available(self) -> bool:
+        """Whether Redis is used, i.e. no failure within the last cooldown seconds."""
+        return time.monotonic() >= self._retry_at
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        """Report a failed operation and bypass Redis for the cooldown."""
+        print(f"Redis cache {operation} failed, bypassing it for {self.cooldown:g} s: {error!r}")
+        self._retry_at = time.monotonic() + self.cooldown
+
+    async def get_many(self, features: Sequence[tuple]) -> List[Optional[np.ndarray]]:
+        """Fetch the probabilities of several feature tuples with one MGET."""
+        if not self.available:
+            return [None] * len(features)
+        try:
+            keys = [self.key(f) for f in features]
+        except orjson.JSONEncodeError as e:
+            print(f"Redis cache key encoding failed: {e}")
+            return [None] * len(features)
+        try:
+            values = await asyncio.wait_for(self.client.mget(keys), self.read_timeout)
+        except (RedisError, asyncio.TimeoutError) as e:
+            self._failed("read", e)
+            return [None] * len(features)
+        return [_decode(v) for v in values]
+
+    async def put_many(self, features: Sequence[tuple], probabilities: Sequence[np.ndarray]) -> None:
+        """Store the probabilities of several feature tuples in one pipeline."""
+        if not self.available:
+            return
+        try:
+            entries = [
+                (self.key(f), orjson.dumps(p, option=orjson.OPT_SERIALIZE_NUMPY))
+                for f, p in zip(features, probabilities)
+            ]
+        except orjson.JSONEncodeError as e:
+            print(f"Redis cache key encoding failed: {e}")
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in entries:
+                    pipe.setex(key, self.ttl, value)
+                await pipe.execute()
+        except RedisError as e:
+            self._failed("write", e)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self.client.aclose()
+
+
+def _decode(value: Optional[bytes]) -> Optional[np.ndarray]:
+    """Decode a stored [not_fraud, fraud] pair, or None if it is anything else."""
+    if value is None:
+        return None
+    try:
+        probabilities = np.array(orjson.loads(value), dtype=np.float64)
+    except (orjson.JSONDecodeError, TypeError, ValueError):
+        return None
+    return probabilities if probabilities.shape == (2,) else None
@@ -0,0 +1,55 @@
+"""
+Export the trained fraud model to ONNX
+Converts artifacts/fraud_model.pkl into artifacts/fraud_model.onnx for ONNX Runtime
+
+Run this again whenever the model is retrained:
+    python export_onnx.py
+"""
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType, StringTensorType
+from sklearn.preprocessing import OneHotEncoder
+from inference import ONNX_FINGERPRINT_KEY, model_fingerprint
+
+PICKLE_PATH = "./artifacts/fraud_model.pkl"
+ONNX_PATH = "./artifacts/fraud_model.onnx"
+
+
+def export(pickle_path: str = PICKLE_PATH, onnx_path: str = ONNX_PATH) -> None:
+    """
+    Convert the pipeline to ONNX with one input per feature.
+
+    Columns handled by the one-hot encoder become string inputs and every
+    other column a float input, in the order of feature_names_in_. The
+    classifier outputs plain probability tensors instead of a ZipMap. The
+    pickle's model_fingerprint is stored in the metadata so load_model()
+    can tell whether the export is current.
+    """
+    pipeline = joblib.load(pickle_path)
+
+    categorical = set()
+    for _, transformer, columns in pipeline.named_steps["preprocessor"].transformers_:
+        if isinstance(transformer, OneHotEncoder):
+            categorical.update(columns)
+
+    initial_types = [
+        (name, StringTensorType([None, 1]) if name in categorical else FloatTensorType([None, 1]))
+        for name in pipeline.feature_names_in_
+    ]
+    onnx_model = convert_sklearn(
+        pipeline,
+        initial_types=initial_types,
+        options={id(pipeline.steps[-1][1]): {"zipmap": False}},
+        target_opset=17
+    )
+    metadata = onnx_model.metadata_props.add()
+    metadata.key = ONNX_FINGERPRINT_KEY
+    metadata.value = model_fingerprint(pickle_path)
+    with open(onnx_path, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    print(f"Exported {pickle_path} to {onnx_path}")
+
+
+if __name__ == "__main__":
+    export()
@@ -0,0 +1,57 @@
+"""
+Temporal features
+Numba kernel decomposing transaction times into the model's temporal features
+"""
+
+from datetime import date, datetime
+import numpy as np
+from numba import njit
+
+# Output columns of decompose_epoch, in order
+TEMPORAL_FEATURES = ("trans_hour", "trans_day", "trans_month", "trans_weekday")
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def epoch_hours(dt: datetime) -> int:
+    """
+    Hours elapsed since 1970-01-01T00:00 on the transaction's wall clock.
+
+    Any timezone is ignored so the decomposed features match the local
+    hour, day, month and weekday of the datetime itself.
+
+    Args:
+        dt (datetime): Transaction date and time
+
+    Returns:
+        int: Whole hours since the Unix epoch
+    """
+    return (dt.toordinal() - UNIX_EPOCH_ORDINAL) * 24 + dt.hour
+
+
+@njit(cache=True)
+def decompose_epoch(epoch: np.ndarray, out: np.ndarray) -> None:
+    """
+    Fill hour, day, month and weekday for each epoch timestamp.
+
+    Uses Howard Hinnant's civil_from_days algorithm in integer arithmetic,
+    so no datetime objects are created.
+
+    Args:
+        epoch (np.ndarray): int64 seconds since the Unix epoch, shape [n]
+        out (np.ndarray): int64 array of shape [n, 4] receiving the columns
+            of TEMPORAL_FEATURES; weekday is 0 for Monday
+    """
+    for i in range(epoch.shape[0]):
+        days = epoch[i] // 86400
+        z = days + 719468
+        era = z // 146097
+        doe = z - era * 146097
+        yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+        doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * doy + 2) // 153
+        out[i, 0] = (epoch[i] // 3600) % 24
+        out[i, 1] = doy - (153 * mp + 2) // 5 + 1
+        out[i, 2] = mp + 3 if mp < 10 else mp - 9
+        # 1970-01-01 was a Thursday
+        out[i, 3] = (days + 3) % 7
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the Fraud Detection API
+
+Runs one Uvicorn worker process per CPU core so CPU-bound inference is
+spread across cores. The app is preloaded in the master process, so the
+model is loaded once and shared with the forked workers copy-on-write.
+
+Usage:
+    gunicorn api:app -c gunicorn_conf.py
+"""
+
+import multiprocessing
+
+bind = "0.0.0.0:8080"
+workers = multiprocessing.cpu_count()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Reuse client connections for as long as Uvicorn's own default
+keepalive = 5
+
+# Access logs cost more per request than a cached prediction
+accesslog = None
+loglevel = "warning"
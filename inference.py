@@ -0,0 +1,263 @@
+"""
+Model backends
+Score batches of feature rows with the folded linear model, ONNX Runtime or
+the scikit-learn pipeline
+"""
+
+import os
+import joblib
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+import xxhash
+from scipy.special import expit
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+# Code given by LinearModel.encode to categories unseen during training
+UNKNOWN_CODE = -1
+
+# ONNX metadata entry holding the model_fingerprint of the exported pickle
+ONNX_FINGERPRINT_KEY = "model_fingerprint"
+
+
+class SklearnModel:
+    """
+    Scores feature rows with the trained scikit-learn pipeline.
+
+    Args:
+        pipeline: Fitted pipeline loaded from the pickle artifact
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.feature_names_in_ = pipeline.feature_names_in_
+        self._columns = pd.Index(pipeline.feature_names_in_)
+
+    def _frame(self, rows: np.ndarray) -> pd.DataFrame:
+        # The ColumnTransformer selects its columns by name
+        return pd.DataFrame(rows, columns=self._columns, copy=False)
+
+    def predict_proba(self, rows: np.ndarray) -> np.ndarray:
+        """Return the [not_fraud, fraud] probabilities for each row."""
+        return self.pipeline.predict_proba(self._frame(rows))
+
+
+class LinearModel:
+    """
+    Scores feature rows by evaluating the pipeline's logistic regression directly.
+
+    The one-hot encoder and the classifier are folded at load time. Each
+    categorical column gets a table mapping its fitted categories to int32
+    ordinal codes, like an OrdinalEncoder with unknown_value=UNKNOWN_CODE,
+    and a row of coefficients indexed by those codes. Scoring a batch
+    encodes it into an int32 code matrix, gathers the coefficients in one
+    indexing operation and adds a dot product over the numeric columns.
+    Unknown categories index a zero coefficient, as with
+    handle_unknown="ignore". Results match the pipeline to float64 rounding.
+
+    Args:
+        pipeline: Fitted pipeline of a ColumnTransformer and a binary
+            LogisticRegression
+
+    Raises:
+        ValueError: If the pipeline cannot be folded
+    """
+
+    def __init__(self, pipeline):
+        if len(pipeline.steps) != 2:
+            raise ValueError("Expected a preprocessor and a classifier")
+        preprocessor, clf = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError("Preprocessor is not a ColumnTransformer")
+        if not isinstance(clf, LogisticRegression) or len(clf.classes_) != 2:
+            raise ValueError("Classifier is not a binary LogisticRegression")
+
+        feature_names = pipeline.feature_names_in_.tolist()
+        coef = clf.coef_[0]
+        self.feature_names_in_ = pipeline.feature_names_in_
+        self._intercept = clf.intercept_[0]
+
+        # {column: {category: code}} for each categorical column
+        self.category_codes = {}
+        category_positions = []
+        category_weights = []
+        numeric_positions = []
+        numeric_weights = []
+        for name, transformer, columns in preprocessor.transformers_:
+            weights = coef[preprocessor.output_indices_[name]]
+            if transformer == "drop":
+                continue
+            if isinstance(transformer, OneHotEncoder):
+                if (transformer.handle_unknown != "ignore" or transformer.drop is not None
+                        or transformer.min_frequency is not None
+                        or transformer.max_categories is not None):
+                    raise ValueError("Unsupported OneHotEncoder configuration")
+                offset = 0
+                for column, categories in zip(columns, transformer.categories_):
+                    self.category_codes[column] = {
+                        category: code for code, category in enumerate(categories.tolist())
+                    }
+                    category_positions.append(feature_names.index(column))
+                    category_weights.append(weights[offset:offset + len(categories)])
+                    offset += len(categories)
+            elif transformer == "passthrough" or (
+                    isinstance(transformer, FunctionTransformer) and transformer.func is None):
+                numeric_positions.extend(feature_names.index(column) for column in columns)
+                numeric_weights.append(weights)
+            else:
+                raise ValueError(f"Unsupported transformer: {transformer!r}")
+
+        # Row positions and code tables of the categorical columns, in code
+        # matrix order
+        self._category_positions = np.array(category_positions, dtype=np.intp)
+        self._category_tables = list(self.category_codes.values())
+        # Row c holds column c's coefficients, zero-padded so that
+        # UNKNOWN_CODE (-1) always selects a trailing zero
+        width = max((len(w) for w in category_weights), default=0) + 1
+        self._category_weights = np.zeros((len(category_weights), width))
+        for c, w in enumerate(category_weights):
+            self._category_weights[c, :len(w)] = w
+        self._category_rows = np.arange(len(category_weights))[:, np.newaxis]
+
+        self._numeric_positions = np.array(numeric_positions, dtype=np.intp)
+        self._numeric_weights = np.concatenate(numeric_weights) if numeric_weights else np.empty(0)
+
+    def encode(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Encode the categorical columns of rows as ordinal codes.
+
+        Args:
+            rows (np.ndarray): Object array in feature_names_in_ order
+
+        Returns:
+            np.ndarray: int32 array of shape [categorical columns, n], with
+            UNKNOWN_CODE for categories not seen during training
+        """
+        columns = rows[:, self._category_positions].T.tolist()
+        return np.array([
+            [table.get(value, UNKNOWN_CODE) for value in column]
+            for column, table in zip(columns, self._category_tables)
+        ], dtype=np.int32).reshape(len(self._category_tables), len(rows))
+
+    def _decision(self, rows: np.ndarray) -> np.ndarray:
+        codes = self.encode(rows)
+        scores = self._category_weights[self._category_rows, codes].sum(axis=0)
+        scores += self._intercept
+        numeric = rows[:, self._numeric_positions].astype(np.float64)
+        scores += numeric @ self._numeric_weights
+        return scores
+
+    def predict_proba(self, rows: np.ndarray) -> np.ndarray:
+        """Return the [not_fraud, fraud] probabilities for each row."""
+        fraud = expit(self._decision(rows))
+        return np.column_stack([1 - fraud, fraud])
+
+
+class OnnxModel:
+    """
+    Scores feature rows with the pipeline exported to ONNX.
+
+    The graph, produced by export_onnx.py, contains the one-hot encoder and
+    the classifier and takes one [n, 1] input per feature: strings for the
+    categorical columns and float32 for the numeric ones. The fingerprint
+    of the pickle it was exported from is read from its metadata, or None
+    for an export without one.
+
+    Args:
+        path (str): Path to the .onnx file
+    """
+
+    def __init__(self, path: str):
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.fingerprint = metadata.get(ONNX_FINGERPRINT_KEY)
+        inputs = self.session.get_inputs()
+        self.feature_names_in_ = np.array([i.name for i in inputs])
+        self._inputs = [
+            (i.name, None if i.type == "tensor(string)" else np.float32)
+            for i in inputs
+        ]
+
+    def _feed(self, rows: np.ndarray) -> dict:
+        feed = {}
+        for j, (name, dtype) in enumerate(self._inputs):
+            column = rows[:, j:j + 1]
+            feed[name] = column if dtype is None else column.astype(dtype)
+        return feed
+
+    def predict_proba(self, rows: np.ndarray) -> np.ndarray:
+        """Return the [not_fraud, fraud] probabilities for each row."""
+        return self.session.run(["probabilities"], self._feed(rows))[0]
+
+
+def load_model(pickle_path: str, onnx_path: str):
+    """
+    Load the fraud model with the fastest backend that supports it.
+
+    The pipeline is folded into a LinearModel when possible. Otherwise the
+    ONNX export is used when it exists and was exported from this pickle,
+    and the pipeline itself as a last resort, so a stale export is never
+    served after the model is retrained.
+
+    Args:
+        pickle_path (str): Path to the scikit-learn pipeline pickle
+        onnx_path (str): Path to the ONNX export of the same pipeline
+
+    Returns:
+        LinearModel, OnnxModel or SklearnModel: Backend taking rows in
+        feature_names_in_ order
+    """
+    pipeline = joblib.load(pickle_path)
+    try:
+        return LinearModel(pipeline)
+    except ValueError as e:
+        print(f"Cannot fold model into a LinearModel: {e}")
+    if os.path.exists(onnx_path):
+        onnx_model = OnnxModel(onnx_path)
+        if onnx_model.fingerprint == model_fingerprint(pickle_path):
+            return onnx_model
+        print(f"Ignoring {onnx_path}: not exported from {pickle_path}, rerun export_onnx.py")
+    return SklearnModel(pipeline)
+
+
+def model_fingerprint(path: str) -> str:
+    """
+    Identify a model artifact by the xxHash of its contents.
+
+    Args:
+        path (str): Path to the model file
+
+    Returns:
+        str: Hex digest that changes whenever the model is retrained
+    """
+    with open(path, "rb") as f:
+        return xxhash.xxh64_hexdigest(f.read())
+
+
+# Model loaded once in each inference worker process by init_worker()
+_worker_model = None
+
+
+def init_worker(pickle_path: str, onnx_path: str) -> None:
+    """
+    ProcessPoolExecutor initializer loading the model in a worker process.
+
+    Args:
+        pickle_path (str): Path to the scikit-learn pipeline pickle
+        onnx_path (str): Path to the ONNX export of the same pipeline
+    """
+    global _worker_model
+    _worker_model = load_model(pickle_path, onnx_path)
+
+
+def predict_proba_worker(rows: np.ndarray) -> np.ndarray:
+    """Score rows with the model loaded by init_worker()."""
+    return _worker_model.predict_proba(rows)
+
+
+def warmup_worker(rows: np.ndarray) -> int:
+    """Score rows with the worker's model and return the worker's process ID."""
+    predict_proba_worker(rows)
+    return os.getpid()
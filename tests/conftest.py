@@ -9,7 +9,7 @@ import pytest
 import json
 from pathlib import Path
 from fastapi.testclient import TestClient
-from api import app
+from api import app, prediction_cache
 
 
 @pytest.fixture
@@ -19,11 +19,27 @@ def client():
     
     This fixture provides a TestClient instance for making HTTP requests
     to the API endpoints without needing to run the actual server.
+    The client is used as a context manager so the app lifespan runs
+    and the prediction batcher is started.
     
-    Returns:
+    Yields:
         TestClient: FastAPI test client for API requests
     """
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    """
+    Empty the prediction cache around every test.
+    
+    Tests mock the model with different outputs for the same transaction,
+    so a prediction cached by one test must not leak into the next.
+    """
+    prediction_cache.clear()
+    yield
+    prediction_cache.clear()
 
 
 @pytest.fixture
@@ -39,4 +55,52 @@ def valid_transaction():
     """
     test_data_path = Path(__file__).parent / "fraud_test.json"
     with open(test_data_path, 'r') as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+
+@pytest.fixture
+def fake_redis():
+    """
+    Provide an in-memory stand-in for the redis.asyncio client.
+    
+    Returns:
+        FakeRedis: Client whose store dict holds the values written
+    """
+    return FakeRedis()
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client calls the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+        self.expiry = {}
+
+    async def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+
+    async def execute(self):
+        for key, ttl, value in self.commands:
+            self.redis.store[key] = value
+            self.redis.expiry[key] = ttl
@@ -2,9 +2,16 @@
 Simple tests for Fraud Detection API
 """
 
+import asyncio
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+import httpx
+from fastapi.testclient import TestClient
 import numpy as np
+import api
+from basemodel import InputData
+from cache import RedisPredictionCache
+from features import epoch_hours
 
 
 class TestAPIEndpoints:
@@ -47,7 +54,6 @@ class TestAPIEndpoints:
             'lat', 'long', 'city_pop', 'trans_hour', 'trans_day',
             'trans_month', 'trans_weekday'
         ])
-        mock_model.predict.return_value = np.array([0])  # Not fraud
         mock_model.predict_proba.return_value = np.array([[0.92, 0.08]])
 
         response = client.post("/api/predict", json=valid_transaction)
@@ -73,7 +79,6 @@ class TestAPIEndpoints:
             'lat', 'long', 'city_pop', 'trans_hour', 'trans_day',
             'trans_month', 'trans_weekday'
         ])
-        mock_model.predict.return_value = np.array([1])  # Fraud
         mock_model.predict_proba.return_value = np.array([[0.15, 0.85]])
 
         response = client.post("/api/predict", json=valid_transaction)
@@ -81,3 +86,206 @@ class TestAPIEndpoints:
         data = response.json()
         assert data["prediction"] == "fraud"
         assert data["proba"]["fraud"] > data["proba"]["not_fraud"]
+
+    @patch('api.model')
+    def test_predict_model_error(self, mock_model, client, valid_transaction):
+        """
+        Test 4: Model errors raised inside the batcher reach the request.
+        
+        Unit test that mocks the model to raise a ValueError. Validates that
+        the batcher forwards the exception to the waiting request, which is
+        answered with a 400 instead of hanging.
+        """
+        mock_model.predict_proba.side_effect = ValueError("bad input")
+
+        response = client.post("/api/predict", json=valid_transaction)
+        assert response.status_code == 400
+        assert "bad input" in response.json()["detail"]
+
+    @patch('api.model')
+    def test_predict_cached(self, mock_model, client, valid_transaction):
+        """
+        Test 5: Repeated transactions are served from the prediction cache.
+        
+        Unit test that sends the same transaction twice. Validates that the
+        model is only called for the first request and that both responses
+        carry the same prediction.
+        """
+        mock_model.predict_proba.return_value = np.array([[0.15, 0.85]])
+
+        first = client.post("/api/predict", json=valid_transaction)
+        second = client.post("/api/predict", json=valid_transaction)
+        assert first.json() == second.json()
+        assert mock_model.predict_proba.call_count == 1
+
+    def test_predict_invalid_input(self, client, valid_transaction):
+        """
+        Test 6: Invalid transactions are rejected before reaching the model.
+        
+        Validates that unknown fields, out-of-range amounts and city
+        populations fail input validation with a 422.
+        """
+        response = client.post(
+            "/api/predict", json={**valid_transaction, "unknown": "value"}
+        )
+        assert response.status_code == 422
+
+        response = client.post("/api/predict", json={**valid_transaction, "amt": -1})
+        assert response.status_code == 422
+
+        response = client.post("/api/predict", json={**valid_transaction, "city_pop": 10**20})
+        assert response.status_code == 422
+
+    @patch('api.model')
+    def test_predict_unexpected_error(self, mock_model, client, valid_transaction):
+        """
+        Test 7: Unexpected model errors are not reported as client errors.
+        
+        Unit test that mocks the model to raise a RuntimeError. Validates that
+        it is no longer turned into a 400 but propagates to FastAPI's server
+        error handling, which the test client re-raises.
+        """
+        mock_model.predict_proba.side_effect = RuntimeError("model crashed")
+
+        with pytest.raises(RuntimeError, match="model crashed"):
+            client.post("/api/predict", json=valid_transaction)
+
+
+    @patch('api.model')
+    def test_predict_batches_concurrent_requests(self, mock_model, valid_transaction):
+        """
+        Test 8: Concurrent requests are grouped into shared model calls.
+        
+        Sends 100 distinct transactions at once through the running app.
+        Validates that the batcher scores them in calls of more than one and
+        at most MAX_BATCH rows, and that every request gets its own answer.
+        """
+        mock_model.predict_proba.side_effect = (
+            lambda rows: np.tile([0.92, 0.08], (len(rows), 1))
+        )
+
+        async def post_all():
+            async with api.lifespan(api.app):
+                # Forget the startup warmup call
+                mock_model.predict_proba.reset_mock()
+                transport = httpx.ASGITransport(app=api.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await asyncio.gather(*(
+                        client.post("/api/predict", json={**valid_transaction, "amt": i + 1})
+                        for i in range(100)
+                    ))
+
+        responses = asyncio.run(post_all())
+        assert all(response.status_code == 200 for response in responses)
+
+        sizes = [len(call.args[0]) for call in mock_model.predict_proba.call_args_list]
+        assert sum(sizes) == 100
+        assert all(1 < size <= api.MAX_BATCH for size in sizes)
+
+    @patch('api.INFERENCE_PROCESSES', 2)
+    def test_predict_process_pool(self, valid_transaction):
+        """
+        Test 9: Batches are scored in the process pool, which survives a crash.
+        
+        Starts the app with two inference processes. Validates that both
+        workers are running before the first request, that predictions are
+        served through the pool, and that after its workers are killed the
+        pool is replaced and requests still succeed.
+        """
+        with TestClient(api.app) as client:
+            assert len(api.inference_executor._processes) == 2
+
+            first = client.post("/api/predict", json=valid_transaction)
+            assert first.status_code == 200
+
+            pool = api.inference_executor
+            for process in list(pool._processes.values()):
+                process.kill()
+                process.join()
+
+            second = client.post("/api/predict", json={**valid_transaction, "amt": 1})
+            assert second.status_code == 200
+            assert api.inference_executor is not pool
+
+            third = client.post("/api/predict", json={**valid_transaction, "amt": 2})
+            assert third.status_code == 200
+
+    @patch('api.model')
+    def test_predict_redis_cache(self, mock_model, fake_redis, valid_transaction):
+        """
+        Test 10: Predictions found in Redis are not scored again.
+        
+        Stores one transaction's probabilities in a fake Redis and sends it
+        alone, then together with an unknown transaction. Validates that
+        hits are answered from Redis and that only the misses reach the model.
+        """
+        mock_model.predict_proba.side_effect = (
+            lambda rows: np.tile([0.92, 0.08], (len(rows), 1))
+        )
+        cache = RedisPredictionCache(fake_redis, namespace="model")
+        request = InputData(**valid_transaction)
+        features = tuple(getattr(request, name) for name in api.INPUT_FIELDS) + (
+            epoch_hours(request.trans_date_trans_time),
+        )
+        asyncio.run(cache.put_many([features], np.array([[0.15, 0.85]])))
+        unknown = {**valid_transaction, "amt": 1}
+
+        async def post_all():
+            async with api.lifespan(api.app):
+                mock_model.predict_proba.reset_mock()
+                transport = httpx.ASGITransport(app=api.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    hit = await client.post("/api/predict", json=valid_transaction)
+                    assert mock_model.predict_proba.call_count == 0
+
+                    api.prediction_cache.clear()
+                    return [hit] + await asyncio.gather(
+                        client.post("/api/predict", json=valid_transaction),
+                        client.post("/api/predict", json=unknown)
+                    )
+
+        with patch('api.redis_cache', cache):
+            hit, cached, scored = asyncio.run(post_all())
+
+        assert hit.json() == cached.json()
+        assert cached.json()["prediction"] == "fraud"
+        assert scored.json()["prediction"] == "not_fraud"
+        sizes = [len(call.args[0]) for call in mock_model.predict_proba.call_args_list]
+        assert sizes == [1]
+
+    @patch('api.model')
+    def test_predict_redis_errors_resolve_batch(self, mock_model, fake_redis, valid_transaction):
+        """
+        Test 11: Failed Redis lookups never leave a batch waiting.
+        
+        Queues a sent transaction with one that orjson cannot encode as a
+        cache key (InputData now rejects such a city_pop, so it is queued
+        directly), then makes the Redis client itself raise. Validates that
+        the first batch is scored and that the error reaches the request.
+        """
+        mock_model.predict_proba.side_effect = (
+            lambda rows: np.tile([0.92, 0.08], (len(rows), 1))
+        )
+        cache = RedisPredictionCache(fake_redis, namespace="model")
+        oversized = ("", "", "", "", "", 0.0, 0.0, 0.0, 10**20, 0)
+
+        async def post_all():
+            async with api.lifespan(api.app):
+                transport = httpx.ASGITransport(app=api.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    queued = asyncio.get_running_loop().create_future()
+                    await api.prediction_queue.put((oversized, queued))
+                    response = await asyncio.wait_for(
+                        client.post("/api/predict", json=valid_transaction), 1
+                    )
+                    assert response.status_code == 200
+                    await asyncio.wait_for(queued, 1)
+
+                    fake_redis.mget = MagicMock(side_effect=RuntimeError("redis crashed"))
+                    await asyncio.wait_for(
+                        client.post("/api/predict", json={**valid_transaction, "amt": 1}), 1
+                    )
+
+        with patch('api.redis_cache', cache):
+            with pytest.raises(RuntimeError, match="redis crashed"):
+                asyncio.run(post_all())
@@ -0,0 +1,91 @@
+"""
+Tests for the prediction caches
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+import numpy as np
+from cache import PredictionCache, RedisPredictionCache
+
+
+class TestPredictionCache:
+    """
+    Checks bounded storage and insertion-order eviction.
+    """
+
+    def test_evicts_oldest_entry(self):
+        """Once full, each new key drops the oldest one"""
+        cache = PredictionCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+    def test_update_keeps_size(self):
+        """Storing an existing key replaces its value without evicting"""
+        cache = PredictionCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("a", 10)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 10
+        assert cache.get("b") == 2
+
+
+class TestRedisPredictionCache:
+    """
+    Checks the Redis cache round trip against an in-memory client.
+    """
+
+    def test_round_trip(self, fake_redis):
+        """Stored probabilities are read back; unknown tuples miss"""
+        client = fake_redis
+        cache = RedisPredictionCache(client, namespace="model", ttl=60)
+        stored = ("Walmart", "groceries", 120.0, 484884)
+        missing = ("Target", "groceries", 120.0, 484884)
+
+        asyncio.run(cache.put_many([stored], np.array([[0.92, 0.08]])))
+        hit, miss = asyncio.run(cache.get_many([stored, missing]))
+
+        np.testing.assert_array_equal(hit, [0.92, 0.08])
+        assert miss is None
+        assert list(client.expiry.values()) == [60]
+        assert all(key.startswith("fraud:model:") for key in client.store)
+
+    def test_malformed_values_miss(self, fake_redis):
+        """Anything but a [not_fraud, fraud] pair is treated as a miss"""
+        cache = RedisPredictionCache(fake_redis, namespace="model")
+        features = [("Walmart", "groceries", float(i), 484884) for i in range(4)]
+        for f, value in zip(features, [b"[0.5]", b"0.5", b"{}", b"not json"]):
+            fake_redis.store[cache.key(f)] = value
+
+        assert asyncio.run(cache.get_many(features)) == [None] * 4
+
+    def test_timeout_bypasses_redis(self, fake_redis):
+        """A stalled lookup is abandoned and Redis is skipped for the cooldown"""
+        async def stalled_mget(keys):
+            await asyncio.sleep(1)
+
+        fake_redis.mget = MagicMock(side_effect=stalled_mget)
+        cache = RedisPredictionCache(fake_redis, namespace="model", read_timeout=0.01, cooldown=60)
+        features = [("Walmart", "groceries", 120.0, 484884)]
+
+        assert asyncio.run(cache.get_many(features)) == [None]
+        assert not cache.available
+        assert asyncio.run(cache.get_many(features)) == [None]
+        assert fake_redis.mget.call_count == 1
+
+    def test_unencodable_features_skip_redis(self, fake_redis):
+        """Features orjson cannot encode miss and are never written"""
+        cache = RedisPredictionCache(fake_redis, namespace="model")
+        features = [("Walmart", "groceries", 120.0, 10**20)]
+
+        assert asyncio.run(cache.get_many(features)) == [None]
+        asyncio.run(cache.put_many(features, np.array([[0.92, 0.08]])))
+        assert fake_redis.store == {}
+        assert cache.available
@@ -0,0 +1,30 @@
+"""
+Tests for the temporal feature kernel
+"""
+
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from features import decompose_epoch, epoch_hours
+
+
+class TestTemporalFeatures:
+    """
+    Checks decompose_epoch against Python's datetime.
+    """
+
+    def test_decompose_matches_datetime(self):
+        """Hour, day, month and weekday agree with datetime, before and after 1970"""
+        start = datetime(1900, 1, 1)
+        datetimes = [start + timedelta(hours=h) for h in range(0, 200 * 365 * 24, 997)]
+
+        epoch = np.array([epoch_hours(dt) * 3600 for dt in datetimes], dtype=np.int64)
+        out = np.empty((len(datetimes), 4), dtype=np.int64)
+        decompose_epoch(epoch, out)
+
+        expected = [[dt.hour, dt.day, dt.month, dt.weekday()] for dt in datetimes]
+        np.testing.assert_array_equal(out, expected)
+
+    def test_epoch_hours_ignores_timezone(self):
+        """Aware datetimes are decomposed on their own wall clock"""
+        aware = datetime(2025, 1, 26, 12, 30, tzinfo=timezone(timedelta(hours=-8)))
+        assert epoch_hours(aware) == epoch_hours(datetime(2025, 1, 26, 12, 30))
@@ -0,0 +1,114 @@
+"""
+Tests for the model backends
+"""
+
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+import onnx
+from inference import (
+    ONNX_FINGERPRINT_KEY, UNKNOWN_CODE, LinearModel, OnnxModel, SklearnModel, init_worker,
+    load_model, model_fingerprint, predict_proba_worker, warmup_worker
+)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    """Load the trained scikit-learn pipeline."""
+    return joblib.load("./artifacts/fraud_model.pkl")
+
+
+@pytest.fixture(scope="module")
+def rows(pipeline):
+    """
+    Build feature rows from the training data, in the model's feature order.
+    
+    Returns:
+        np.ndarray: Object array with one row per transaction
+    """
+    data = pd.read_csv("./data/fraud_data.csv", nrows=500)
+    trans_datetime = pd.to_datetime(data["trans_date_trans_time"], format="%d-%m-%Y %H:%M")
+    data["trans_hour"] = trans_datetime.dt.hour
+    data["trans_day"] = trans_datetime.dt.day
+    data["trans_month"] = trans_datetime.dt.month
+    data["trans_weekday"] = trans_datetime.dt.weekday
+    return data[pipeline.feature_names_in_].to_numpy(dtype=object)
+
+
+class TestBackends:
+    """
+    Checks that every backend reproduces the scikit-learn pipeline.
+    """
+
+    def test_linear_matches_pipeline(self, pipeline, rows):
+        """The folded linear model gives the pipeline's probabilities and classes"""
+        reference = SklearnModel(pipeline)
+        linear_model = LinearModel(pipeline)
+
+        # Unknown categories must be ignored like the one-hot encoder does
+        unknown = rows[:5].copy()
+        unknown[:, pipeline.feature_names_in_.tolist().index("merchant")] = "unknown"
+        rows = np.vstack([rows, unknown])
+
+        probabilities = linear_model.predict_proba(rows)
+        np.testing.assert_allclose(probabilities, reference.predict_proba(rows), rtol=1e-9)
+
+        # Thresholding the fraud probability at 0.5 reproduces pipeline.predict
+        features = pd.DataFrame(rows, columns=pipeline.feature_names_in_)
+        np.testing.assert_array_equal(
+            (probabilities[:, 1] >= 0.5).astype(int), pipeline.predict(features)
+        )
+
+    def test_linear_codes_match_encoder(self, pipeline, rows):
+        """Categories are coded by their encoder index, unknown ones as UNKNOWN_CODE"""
+        linear_model = LinearModel(pipeline)
+        encoder = pipeline.named_steps["preprocessor"].named_transformers_["cat"]
+        merchant = pipeline.feature_names_in_.tolist().index("merchant")
+
+        rows = rows[:2].copy()
+        rows[0, merchant] = encoder.categories_[0][3]
+        rows[1, merchant] = "unknown"
+        codes = linear_model.encode(rows)
+
+        assert codes.dtype == np.int32
+        assert codes[0, 0] == 3
+        assert codes[0, 1] == UNKNOWN_CODE
+
+    def test_onnx_matches_pipeline(self, pipeline, rows):
+        """The ONNX export gives the same probabilities"""
+        reference = SklearnModel(pipeline)
+        onnx_model = OnnxModel("./artifacts/fraud_model.onnx")
+
+        assert onnx_model.fingerprint == model_fingerprint("./artifacts/fraud_model.pkl")
+        assert onnx_model.feature_names_in_.tolist() == pipeline.feature_names_in_.tolist()
+        np.testing.assert_allclose(
+            onnx_model.predict_proba(rows), reference.predict_proba(rows), atol=1e-5
+        )
+
+    @patch("inference.LinearModel", side_effect=ValueError("not foldable"))
+    def test_stale_onnx_not_loaded(self, _, tmp_path):
+        """The ONNX fallback is only used when it was exported from the pickle"""
+        assert isinstance(
+            load_model("./artifacts/fraud_model.pkl", "./artifacts/fraud_model.onnx"), OnnxModel
+        )
+
+        stale = onnx.load("./artifacts/fraud_model.onnx")
+        for entry in stale.metadata_props:
+            if entry.key == ONNX_FINGERPRINT_KEY:
+                entry.value = "retrained"
+        onnx.save(stale, tmp_path / "stale.onnx")
+        assert isinstance(
+            load_model("./artifacts/fraud_model.pkl", str(tmp_path / "stale.onnx")), SklearnModel
+        )
+
+    def test_worker_matches_pipeline(self, pipeline, rows):
+        """The process pool entry points score with the loaded model"""
+        init_worker("./artifacts/fraud_model.pkl", "./artifacts/fraud_model.onnx")
+
+        np.testing.assert_allclose(
+            predict_proba_worker(rows), SklearnModel(pipeline).predict_proba(rows), rtol=1e-9
+        )
+        assert warmup_worker(rows[:1]) == os.getpid()